@@ -1,18 +1,19 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import re
 import shutil
 import sys
 from pathlib import Path
 
 
-def read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
-
-
 def write_text(path: Path, content: str) -> None:
-    path.write_text(content, encoding="utf-8")
+    # Encode once and replace atomically so a crash mid-write never leaves
+    # a truncated source file behind.
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(content.encode("utf-8"))
+    os.replace(tmp, path)
 
 
 def backup_once(path: Path) -> None:
@@ -21,13 +22,110 @@ def backup_once(path: Path) -> None:
         shutil.copy2(path, backup)
 
 
+class _Editor:
+    """Batches (start, end, replacement) edits against one source string.
+
+    Every ``text[:pos] + insert + text[pos:]`` splice reallocates the full
+    text; collecting the edits and applying them in a single join keeps the
+    rebuild at one O(n) pass however many edits there are.  Offsets refer
+    to the original string and edits must not overlap.
+    """
+
+    def __init__(self) -> None:
+        self._edits: list[tuple[int, int, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._edits)
+
+    def insert(self, offset: int, replacement: str) -> None:
+        self._edits.append((offset, offset, replacement))
+
+    def replace(self, start: int, end: int, replacement: str) -> None:
+        self._edits.append((start, end, replacement))
+
+    def apply(self, src: str) -> str:
+        parts: list[str] = []
+        cursor = 0
+        for start, end, replacement in sorted(self._edits):
+            if start < cursor:
+                raise ValueError("Overlapping edits")
+            parts.append(src[cursor:start])
+            parts.append(replacement)
+            cursor = end
+        parts.append(src[cursor:])
+        return "".join(parts)
+
+
+# ---- precompiled patterns -------------------------------------------------
+#
+# Every pattern is compiled once at import time and used via the bound
+# pattern.search/pattern.subn form, which skips the re module cache lookup.
+
+# Chromium 144 uses IsDefaultDecoderSupported{Audio,Video}Type; older
+# Chromium used IsDefaultSupported{Audio,Video}Type.  We accept either name.
+_AUDIO_FN_RE = re.compile(r"IsDefault(?:Decoder)?SupportedAudioType")
+_VIDEO_FN_RE = re.compile(r"IsDefault(?:Decoder)?SupportedVideoType")
+
+# One alternation covering all three supported_types.cc rewrites, so the
+# file is walked once with a dispatch callback instead of three times:
+#   - IsDecoderHevcProfileSupported() body -> return true
+#   - IsDecoderDolbyAc3Eac3Supported() body -> return true
+#   - DTS switch cases (kDTS / kDTSXP2 / optional kDTSE, upstream
+#     Chromium 144 layout) returning BUILDFLAG(ENABLE_PLATFORM_DTS_AUDIO)
+#     -> return true
+_SUPPORTED_TYPES_REWRITE_RE = re.compile(
+    r"(?P<hevc_open>bool\s+IsDecoderHevcProfileSupported\s*\(\s*const\s+VideoType\s*&\s*type\s*\)\s*\{)"
+    r".*?(?P<hevc_close>\n\})"
+    r"|"
+    r"(?P<ac3_open>bool\s+IsDecoderDolbyAc3Eac3Supported\s*\(\s*const\s+AudioType\s*&\s*type\s*\)\s*\{)"
+    r".*?(?P<ac3_close>\n\})"
+    r"|"
+    r"(?P<dts_cases>"
+    r"case\s+AudioCodec::kDTS:\s*\n"
+    r"(?:\s*case\s+AudioCodec::kDTSXP2:\s*\n)?"
+    r"(?:\s*case\s+AudioCodec::kDTSE:\s*\n)?"
+    r"\s*)"
+    r"return\s+BUILDFLAG\s*\(\s*ENABLE_PLATFORM_DTS_AUDIO\s*\)\s*;",
+    re.DOTALL,
+)
+
+_AC3_CASE_RE = re.compile(r"case\s+AudioCodec::kAC3:")
+_AAC_MARKER_RE = re.compile(r"([ \t]*)(case\s+AudioCodec::kAAC:)")
+_HEVC_CASE_RE = re.compile(r"case\s+VideoCodec::kHEVC:")
+_H264_MARKER_RE = re.compile(r"([ \t]*)(case\s+VideoCodec::kH264:)")
+
+# One alternation covering all four ffmpeg_common.cc rewrites, applied in a
+# single pass with a dispatch callback:
+#   - AAC codec ID mapping block (insertion anchor for AC3/EAC3/DTS)
+#   - H264 codec ID mapping block (insertion anchor for HEVC)
+#   - GetAllowedVideoDecoders():  return "h264";
+#   - GetAllowedAudioDecoders():  #define EXTRA_CODECS ",aac"
+_FFMPEG_COMMON_REWRITE_RE = re.compile(
+    r"(?P<aac_map>case\s+AudioCodec::kAAC:\s*\n\s*return\s+AV_CODEC_ID_AAC;\s*\n)"
+    r"|(?P<h264_map>case\s+VideoCodec::kH264:\s*\n\s*return\s+AV_CODEC_ID_H264;\s*\n)"
+    r'|(?P<video_allow>return\s+"h264"\s*;)'
+    r'|(?P<audio_allow>#define\s+EXTRA_CODECS\s+",aac")'
+)
+
+# Chromium 144 has kHEVC in the NOTREACHED switch group of
+# GetFFmpegVideoDecoderThreadCount().
+_NOTREACHED_HEVC_RE = re.compile(
+    r"(\n)([ \t]*case\s+VideoCodec::kHEVC:\s*\n)"
+    r"(?=(?:[ \t]*case\s+VideoCodec::\w+:\s*\n)*"
+    r"[ \t]*(?://[^\n]*\n\s*)*NOTREACHED)",
+    re.MULTILINE,
+)
+_HEVC_H264_ADJ_RE = re.compile(
+    r"case\s+VideoCodec::kHEVC:\s*\n\s*case\s+VideoCodec::kH264:"
+)
+
+# Chromium 144 anchor inside GetAllowedDemuxers() in ffmpeg_glue.cc.
+_AAC_PUSH_MARKER = 'allowed_demuxers.push_back("aac");'
+
+
 def patch_supported_types(text: str):
     """Patch media/base/supported_types.cc to unconditionally enable extra codecs.
 
-    Chromium 144 uses IsDefaultDecoderSupportedAudioType / IsDefaultDecoderSupportedVideoType.
-    Older Chromium used IsDefaultSupportedAudioType / IsDefaultSupportedVideoType.
-    We accept either name.
-
     Strategy:
       1. Replace helper function BODIES to unconditionally return true (keeps call
          sites intact, avoids -Wunused-function errors).
@@ -38,163 +136,173 @@ def patch_supported_types(text: str):
     changed = []
 
     # ------- sanity checks -------
-    audio_fn_found = re.search(r"IsDefault(?:Decoder)?SupportedAudioType", text)
-    if not audio_fn_found:
+    if not _AUDIO_FN_RE.search(text):
         raise RuntimeError(
             "Could not find IsDefault[Decoder]SupportedAudioType in supported_types.cc"
         )
 
-    video_fn_found = re.search(r"IsDefault(?:Decoder)?SupportedVideoType", text)
-    if not video_fn_found:
+    if not _VIDEO_FN_RE.search(text):
         raise RuntimeError(
             "Could not find IsDefault[Decoder]SupportedVideoType in supported_types.cc"
         )
 
-    # ------- HEVC: replace IsDecoderHevcProfileSupported() body → return true -------
-    # This keeps the function "used" (still called from the switch) but makes it
-    # unconditionally succeed regardless of BUILDFLAG(ENABLE_PLATFORM_HEVC).
-    hevc_fn_pat = re.compile(
-        r"(bool\s+IsDecoderHevcProfileSupported\s*\(\s*const\s+VideoType\s*&\s*type\s*\)\s*\{)"
-        r".*?"
-        r"(\n\})",
-        re.DOTALL,
-    )
-    text, count = hevc_fn_pat.subn(r"\1\n  return true;\2", text)
-    if count:
-        changed.append(
-            "supported_types.cc: IsDecoderHevcProfileSupported -> return true"
-        )
+    # Regex work is guarded by plain substring probes (C-level memchr);
+    # on already-patched files the regex engine is never invoked.
 
-    # ------- AC3/EAC3: replace IsDecoderDolbyAc3Eac3Supported() body → return true -------
-    ac3_fn_pat = re.compile(
-        r"(bool\s+IsDecoderDolbyAc3Eac3Supported\s*\(\s*const\s+AudioType\s*&\s*type\s*\)\s*\{)"
-        r".*?"
-        r"(\n\})",
-        re.DOTALL,
-    )
-    text, count = ac3_fn_pat.subn(r"\1\n  return true;\2", text)
-    if count:
-        changed.append(
-            "supported_types.cc: IsDecoderDolbyAc3Eac3Supported -> return true"
-        )
+    # ------- HEVC / AC3-EAC3 / DTS rewrites in one pass -------
+    # Replacing the helper function bodies keeps them "used" (still called
+    # from the switch) but makes them unconditionally succeed regardless of
+    # the BUILDFLAG() values.
+    if (
+        "IsDecoderHevcProfileSupported" in text
+        or "IsDecoderDolbyAc3Eac3Supported" in text
+        or "ENABLE_PLATFORM_DTS_AUDIO" in text
+    ):
+        counts = {"hevc": 0, "ac3": 0, "dts": 0}
+
+        def rewrite(match: re.Match) -> str:
+            if match.group("hevc_open"):
+                counts["hevc"] += 1
+                return (
+                    match.group("hevc_open")
+                    + "\n  return true;"
+                    + match.group("hevc_close")
+                )
+            if match.group("ac3_open"):
+                counts["ac3"] += 1
+                return (
+                    match.group("ac3_open")
+                    + "\n  return true;"
+                    + match.group("ac3_close")
+                )
+            counts["dts"] += 1
+            return match.group("dts_cases") + "return true;"
+
+        text = _SUPPORTED_TYPES_REWRITE_RE.sub(rewrite, text)
+        if counts["hevc"]:
+            changed.append(
+                "supported_types.cc: IsDecoderHevcProfileSupported -> return true"
+            )
+        if counts["ac3"]:
+            changed.append(
+                "supported_types.cc: IsDecoderDolbyAc3Eac3Supported -> return true"
+            )
+        if counts["dts"]:
+            changed.append(f"supported_types.cc: DTS return override x{counts['dts']}")
 
-    # ------- DTS: kDTS / kDTSXP2 / (optional kDTSE) → return true -------
-    # Upstream Chromium 144 pattern:
-    #   case AudioCodec::kDTS:
-    #   case AudioCodec::kDTSXP2:
-    #   case AudioCodec::kDTSE:          ← may or may not be present
-    #     return BUILDFLAG(ENABLE_PLATFORM_DTS_AUDIO);
-    dts_pat = re.compile(
-        r"(?P<cases>"
-        r"case\s+AudioCodec::kDTS:\s*\n"
-        r"(?:\s*case\s+AudioCodec::kDTSXP2:\s*\n)?"
-        r"(?:\s*case\s+AudioCodec::kDTSE:\s*\n)?"
-        r"\s*)"
-        r"return\s+BUILDFLAG\s*\(\s*ENABLE_PLATFORM_DTS_AUDIO\s*\)\s*;",
-        re.MULTILINE,
-    )
-    text, count = dts_pat.subn(r"\g<cases>return true;", text)
-    if count:
-        changed.append(f"supported_types.cc: DTS return override x{count}")
+    # Fallback insertions are collected into one editor and applied in a
+    # single rebuild of the string.
+
+    editor = _Editor()
 
     # ------- Fallback insertion: audio codecs -------
     # If the cases were not present at all (already stripped or different layout),
     # insert them before AudioCodec::kAAC as fallthrough.
-    if not re.search(r"case\s+AudioCodec::kAC3:", text):
-        marker_re = re.compile(r"([ \t]*)(case\s+AudioCodec::kAAC:)")
-        m = marker_re.search(text)
+    if "AudioCodec::kAC3" not in text or not _AC3_CASE_RE.search(text):
+        m = _AAC_MARKER_RE.search(text)
         if not m:
             raise RuntimeError("Could not find AudioCodec::kAAC insertion point")
         indent = m.group(1)
-        insert = (
+        editor.insert(
+            m.start(),
             f"{indent}case AudioCodec::kAC3:\n"
             f"{indent}case AudioCodec::kEAC3:\n"
             f"{indent}case AudioCodec::kDTS:\n"
-            f"{indent}case AudioCodec::kDTSXP2:\n"
+            f"{indent}case AudioCodec::kDTSXP2:\n",
         )
-        text = text[: m.start()] + insert + text[m.start() :]
         changed.append(
             "supported_types.cc: inserted AC3/EAC3/DTS/DTSXP2 fallback cases"
         )
 
     # ------- Fallback insertion: HEVC -------
-    if not re.search(r"case\s+VideoCodec::kHEVC:", text):
-        marker_re = re.compile(r"([ \t]*)(case\s+VideoCodec::kH264:)")
-        m = marker_re.search(text)
+    if "VideoCodec::kHEVC" not in text or not _HEVC_CASE_RE.search(text):
+        m = _H264_MARKER_RE.search(text)
         if not m:
             raise RuntimeError("Could not find VideoCodec::kH264 insertion point")
         indent = m.group(1)
-        insert = f"{indent}case VideoCodec::kHEVC:\n{indent}  return true;\n"
-        text = text[: m.start()] + insert + text[m.start() :]
+        editor.insert(
+            m.start(), f"{indent}case VideoCodec::kHEVC:\n{indent}  return true;\n"
+        )
         changed.append("supported_types.cc: inserted HEVC fallback case")
 
+    if editor:
+        text = editor.apply(text)
+
     return text, changed
 
 
 def patch_ffmpeg_common(text: str):
+    """Patch codec ID mappings and decoder allowlists in ffmpeg_common.cc.
+
+    Substring probes decide which of the four rewrites are still needed,
+    then one pass of _FFMPEG_COMMON_REWRITE_RE applies them all (first
+    occurrence each) via a dispatch callback.
+    """
     changed = []
 
-    # ------- Codec ID mappings -------
+    needed = set()
     if (
         "AV_CODEC_ID_AC3" not in text
         or "AV_CODEC_ID_EAC3" not in text
         or "AV_CODEC_ID_DTS" not in text
     ):
-        aac_block = r"(case\s+AudioCodec::kAAC:\s*\n\s*return\s+AV_CODEC_ID_AAC;\s*\n)"
-        add = (
+        needed.add("aac_map")
+    if "AV_CODEC_ID_HEVC" not in text:
+        needed.add("h264_map")
+    if '"h264,hevc"' not in text and '"h264"' in text:
+        needed.add("video_allow")
+    if "#define EXTRA_CODECS" in text and (
+        ",ac3" not in text or ",eac3" not in text or ",dca" not in text
+    ):
+        needed.add("audio_allow")
+
+    if not needed:
+        return text, changed
+
+    replacements = {
+        "aac_map": (
             "    case AudioCodec::kAC3:\n"
             "      return AV_CODEC_ID_AC3;\n"
             "    case AudioCodec::kEAC3:\n"
             "      return AV_CODEC_ID_EAC3;\n"
             "    case AudioCodec::kDTS:\n"
             "      return AV_CODEC_ID_DTS;\n"
-        )
-        new_text, count = re.subn(aac_block, r"\1" + add, text, count=1, flags=re.M)
-        if count == 0:
+        ),
+        "h264_map": "    case VideoCodec::kHEVC:\n      return AV_CODEC_ID_HEVC;\n",
+    }
+    counts = {"aac_map": 0, "h264_map": 0, "video_allow": 0, "audio_allow": 0}
+
+    def rewrite(match: re.Match) -> str:
+        group = match.lastgroup
+        if group not in needed or counts[group]:
+            return match.group(0)
+        counts[group] += 1
+        if group == "video_allow":
+            return 'return "h264,hevc";'
+        if group == "audio_allow":
+            return '#define EXTRA_CODECS ",aac,ac3,eac3,dca"'
+        return match.group(group) + replacements[group]
+
+    text = _FFMPEG_COMMON_REWRITE_RE.sub(rewrite, text)
+
+    if "aac_map" in needed:
+        if not counts["aac_map"]:
             raise RuntimeError("Could not find AAC mapping block in ffmpeg_common.cc")
-        text = new_text
         changed.append("ffmpeg_common.cc: inserted AC3/EAC3/DTS codec ID mappings")
-
-    if "AV_CODEC_ID_HEVC" not in text:
-        h264_map = r"(case\s+VideoCodec::kH264:\s*\n\s*return\s+AV_CODEC_ID_H264;\s*\n)"
-        add = "    case VideoCodec::kHEVC:\n      return AV_CODEC_ID_HEVC;\n"
-        new_text, count = re.subn(h264_map, r"\1" + add, text, count=1, flags=re.M)
-        if count == 0:
+    if "h264_map" in needed:
+        if not counts["h264_map"]:
             raise RuntimeError("Could not find H264 mapping block in ffmpeg_common.cc")
-        text = new_text
         changed.append("ffmpeg_common.cc: inserted HEVC codec ID mapping")
-
-    # ------- Video decoder allowlist (GetAllowedVideoDecoders) -------
-    # Chromium 144 pattern:
-    #   return "h264";
-    # inside GetAllowedVideoDecoders()
-    if '"h264,hevc"' not in text:
-        video_pat = re.compile(r'return\s+"h264"\s*;')
-        text, count = video_pat.subn('return "h264,hevc";', text, count=1)
-        if count:
-            changed.append(
-                "ffmpeg_common.cc: added hevc to GetAllowedVideoDecoders allowlist"
-            )
-        else:
-            # Already patched or different format — not fatal
-            pass
-
-    # ------- Audio decoder allowlist (GetAllowedAudioDecoders) -------
-    # Chromium 144 pattern:
-    #   #define EXTRA_CODECS ",aac"
-    # We add AC3/EAC3/DCA to the EXTRA_CODECS macro.
-    if ",ac3" not in text or ",eac3" not in text or ",dca" not in text:
-        audio_pat = re.compile(r'#define\s+EXTRA_CODECS\s+",aac"')
-        text, count = audio_pat.subn(
-            '#define EXTRA_CODECS ",aac,ac3,eac3,dca"', text, count=1
+    # The allowlist rewrites are not fatal when absent (already patched or
+    # a different upstream layout).
+    if counts["video_allow"]:
+        changed.append(
+            "ffmpeg_common.cc: added hevc to GetAllowedVideoDecoders allowlist"
+        )
+    if counts["audio_allow"]:
+        changed.append(
+            "ffmpeg_common.cc: added ac3/eac3/dca to GetAllowedAudioDecoders allowlist"
         )
-        if count:
-            changed.append(
-                "ffmpeg_common.cc: added ac3/eac3/dca to GetAllowedAudioDecoders allowlist"
-            )
-        else:
-            # Already patched or different format — not fatal
-            pass
 
     return text, changed
 
@@ -210,23 +318,16 @@ def patch_ffmpeg_video_decoder(text: str):
     changed = []
 
     # Chromium 144 has kHEVC in the NOTREACHED switch group — remove it from there.
-    notreached_hevc = re.compile(
-        r"(\n)([ \t]*case\s+VideoCodec::kHEVC:\s*\n)"
-        r"(?=(?:[ \t]*case\s+VideoCodec::\w+:\s*\n)*"
-        r"[ \t]*(?://[^\n]*\n\s*)*NOTREACHED)",
-        re.MULTILINE,
-    )
-    text, removed = notreached_hevc.subn(r"\1", text, count=1)
-    if removed:
-        changed.append("ffmpeg_video_decoder.cc: removed HEVC from NOTREACHED group")
+    if "NOTREACHED" in text and "VideoCodec::kHEVC" in text:
+        text, removed = _NOTREACHED_HEVC_RE.subn(r"\1", text, count=1)
+        if removed:
+            changed.append(
+                "ffmpeg_video_decoder.cc: removed HEVC from NOTREACHED group"
+            )
 
     # Insert HEVC into the multithreaded branch if not already there.
-    already_ok = re.search(
-        r"case\s+VideoCodec::kHEVC:\s*\n\s*case\s+VideoCodec::kH264:", text
-    )
-    if not already_ok:
-        h264_re = re.compile(r"([ \t]*)(case\s+VideoCodec::kH264:)")
-        m = h264_re.search(text)
+    if not _HEVC_H264_ADJ_RE.search(text):
+        m = _H264_MARKER_RE.search(text)
         if not m:
             raise RuntimeError("Could not find H264 case in ffmpeg_video_decoder.cc")
         indent = m.group(1)
@@ -241,9 +342,10 @@ def patch_ffmpeg_video_decoder(text: str):
 def patch_ffmpeg_glue_demuxers(text: str):
     """Add AC3/EAC3/DTS standalone demuxers to GetAllowedDemuxers() in ffmpeg_glue.cc.
 
-    Chromium 144 pattern:
-        allowed_demuxers.push_back("aac");
-    We insert additional push_back calls after it.
+    We insert additional push_back calls after the existing "aac" entry.
+    This is the patcher that runs on every invocation, so it is pure
+    substring work: one find for the anchor, in probes for the entries,
+    no regex engine involved.
     """
     changed = []
 
@@ -251,19 +353,23 @@ def patch_ffmpeg_glue_demuxers(text: str):
     missing = [d for d in demuxers_to_add if f'push_back("{d}")' not in text]
 
     if missing:
-        aac_push = re.compile(
-            r'(^[ \t]*allowed_demuxers\.push_back\(\s*"aac"\s*\)\s*;\s*\n)',
-            re.MULTILINE,
-        )
-        m = aac_push.search(text)
-        if not m:
+        idx = text.find(_AAC_PUSH_MARKER)
+        if idx == -1:
+            raise RuntimeError("Could not find aac demuxer push_back in ffmpeg_glue.cc")
+
+        # Indent is whatever sits between the preceding newline and the anchor.
+        line_start = text.rfind("\n", 0, idx) + 1
+        indent = text[line_start:idx]
+        if indent and not indent.isspace():
             raise RuntimeError("Could not find aac demuxer push_back in ffmpeg_glue.cc")
-        indent_match = re.match(r"^(\s*)", m.group(1))
-        indent = indent_match.group(1) if indent_match else "    "
+
+        line_end = text.find("\n", idx)
+        insert_at = len(text) if line_end == -1 else line_end + 1
+
         insertion = "".join(
             f'{indent}allowed_demuxers.push_back("{d}");\n' for d in missing
         )
-        text = text[: m.end()] + insertion + text[m.end() :]
+        text = text[:insert_at] + insertion + text[insert_at:]
         changed.append(
             f"ffmpeg_glue.cc: inserted {'/'.join(missing)} demuxer allowlist entries"
         )
@@ -271,7 +377,7 @@ def patch_ffmpeg_glue_demuxers(text: str):
     return text, changed
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(
         description="Patch Chromium media layer for extra codecs"
     )
@@ -282,13 +388,36 @@ def main() -> int:
         action="store_true",
         help="Validate and report without writing",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
+    # Each target maps to its patcher plus byte needles that prove the file
+    # was already fully patched: when every needle is present in the raw
+    # bytes, the UTF-8 decode and all regex work are skipped.  Targets whose
+    # patched state has no reliable byte-level marker (structural rewrites)
+    # use an empty needle tuple and are always decoded.
     targets = {
-        Path("media/base/supported_types.cc"): patch_supported_types,
-        Path("media/ffmpeg/ffmpeg_common.cc"): patch_ffmpeg_common,
-        Path("media/filters/ffmpeg_video_decoder.cc"): patch_ffmpeg_video_decoder,
-        Path("media/filters/ffmpeg_glue.cc"): patch_ffmpeg_glue_demuxers,
+        Path("media/base/supported_types.cc"): (patch_supported_types, ()),
+        Path("media/ffmpeg/ffmpeg_common.cc"): (
+            patch_ffmpeg_common,
+            (
+                b"AV_CODEC_ID_AC3",
+                b"AV_CODEC_ID_EAC3",
+                b"AV_CODEC_ID_DTS",
+                b"AV_CODEC_ID_HEVC",
+                b'"h264,hevc"',
+                b",ac3",
+                b",eac3",
+                b",dca",
+            ),
+        ),
+        Path("media/filters/ffmpeg_video_decoder.cc"): (
+            patch_ffmpeg_video_decoder,
+            (),
+        ),
+        Path("media/filters/ffmpeg_glue.cc"): (
+            patch_ffmpeg_glue_demuxers,
+            (b'push_back("ac3")', b'push_back("eac3")', b'push_back("dts")'),
+        ),
     }
 
     for p in targets:
@@ -299,8 +428,11 @@ def main() -> int:
     edits = {}
     summary = []
     try:
-        for path, patch_fn in targets.items():
-            original = read_text(path)
+        for path, (patch_fn, done_needles) in targets.items():
+            raw = path.read_bytes()
+            if done_needles and all(needle in raw for needle in done_needles):
+                continue
+            original = raw.decode("utf-8")
             patched, changed = patch_fn(original)
             edits[path] = (original, patched, changed)
     except Exception as exc: